@@ -0,0 +1,12 @@
+from collections import Counter
+
+
+def get_basket_products(session):
+    products = session.get('products', {})
+    # Старый формат корзины: список pk, по одному элементу на каждую единицу товара
+    if isinstance(products, list):
+        products = dict(Counter(products))
+        session['products'] = products
+    # Счётчик теперь считается из 'products'; убираем ключ, оставшийся от старых сессий
+    session.pop('products_count', None)
+    return products
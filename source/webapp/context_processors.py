@@ -1,3 +1,6 @@
+from webapp.basket import get_basket_products
+
+
 def stats(request):
     return {
         'times': request.session.get('page_times', {}),
@@ -5,3 +8,9 @@ def stats(request):
         'times_total': request.session.get('times_total', 0),
         'visits_total': request.session.get('visits_total', 0)
     }
+
+
+def basket(request):
+    return {
+        'products_count': sum(get_basket_products(request.session).values())
+    }
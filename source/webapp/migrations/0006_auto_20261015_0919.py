@@ -0,0 +1,25 @@
+# Generated by Django 2.1 on 2026-10-15 09:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0005_product_in_order'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created_at'], name='webapp_orde_created_22863c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at'], name='webapp_orde_user_id_5b1b87_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['in_order'], name='webapp_prod_in_orde_ea6a46_idx'),
+        ),
+    ]
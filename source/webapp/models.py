@@ -1,5 +1,10 @@
+from uuid import uuid4
+
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
 CATEGORY_CHOICES = (
     ('other', 'Другое'),
@@ -8,6 +13,10 @@ CATEGORY_CHOICES = (
     ('household', 'Товары для дома'),
 )
 
+INDEX_PRODUCTS_CACHE_KEY = 'index_products'
+PRODUCTS_CACHE_VERSION_KEY = 'products_cache_version'
+ORDERABLE_PRODUCTS_CACHE_KEY = 'orderable_product_pks'
+
 
 class Product(models.Model):
     name = models.CharField(max_length=200, verbose_name='Товар')
@@ -26,6 +35,9 @@ class Product(models.Model):
         permissions = [
             ('can_have_piece_of_pizza', 'Может съесть кусочек пиццы'),
         ]
+        indexes = [
+            models.Index(fields=['in_order']),
+        ]
 
 
 ORDER_STATUS_CHOICES = (
@@ -57,6 +69,10 @@ class Order(models.Model):
     class Meta:
         verbose_name = 'Заказ'
         verbose_name_plural = 'Заказы'
+        indexes = [
+            models.Index(fields=['-created_at']),
+            models.Index(fields=['user', '-created_at']),
+        ]
 
 
 class OrderProduct(models.Model):
@@ -70,3 +86,19 @@ class OrderProduct(models.Model):
     class Meta:
         verbose_name = 'Товар в заказе'
         verbose_name_plural = 'Товары в заказах'
+
+
+def get_product_cache_version():
+    return cache.get_or_set(PRODUCTS_CACHE_VERSION_KEY, lambda: uuid4().hex, None)
+
+
+def clear_product_cache():
+    # Страницы каталога кэшируются по версии, поэтому новая версия делает устаревшими все страницы сразу
+    cache.set(PRODUCTS_CACHE_VERSION_KEY, uuid4().hex, None)
+    cache.delete(ORDERABLE_PRODUCTS_CACHE_KEY)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_changed(sender, **kwargs):
+    clear_product_cache()
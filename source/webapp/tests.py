@@ -1,3 +1,176 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from webapp.models import Product, Order
+from webapp.views import OrderDeliverView, OrderCancelView
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ProductTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(name='Пицца', price=100, photo='product_images/pizza.png')
+
+
+class BasketTestCase(ProductTestCase):
+    def set_basket(self, products):
+        session = self.client.session
+        session['products'] = products
+        session.save()
+
+    def change_basket(self, action, pk=None):
+        if pk is None:
+            pk = self.product.pk
+        return self.client.get(reverse('webapp:basket_change'), {'pk': pk, 'action': action})
+
+    def test_add_increments_quantity(self):
+        self.change_basket('add')
+        self.change_basket('add')
+        self.assertEqual(self.client.session['products'], {str(self.product.pk): 2})
+
+    def test_add_skips_product_taken_out_of_order(self):
+        self.change_basket('add')
+        self.product.in_order = False
+        self.product.save()
+        self.change_basket('add')
+        self.assertEqual(self.client.session['products'], {str(self.product.pk): 1})
+
+    def test_add_skips_deleted_product(self):
+        self.change_basket('add')
+        self.client.force_login(User.objects.create_user('user', password='user'))
+        self.client.post(reverse('webapp:product_delete', kwargs={'pk': self.product.pk}))
+        self.change_basket('add')
+        self.assertEqual(self.client.session['products'], {str(self.product.pk): 1})
+
+    def test_add_ignores_invalid_pk(self):
+        for pk in ('²', 'abc', ''):
+            response = self.change_basket('add', pk=pk)
+            self.assertEqual(response.status_code, 302)
+        self.assertNotIn('products', self.client.session)
+
+    def test_pk_is_normalized(self):
+        self.change_basket('add', pk='01')
+        self.change_basket('add')
+        self.assertEqual(self.client.session['products'], {str(self.product.pk): 2})
+        self.change_basket('remove', pk='01')
+        self.assertEqual(self.client.session['products'], {str(self.product.pk): 1})
+
+    def test_remove_decrements_and_drops_quantity(self):
+        self.set_basket({str(self.product.pk): 2})
+        self.change_basket('remove')
+        self.assertEqual(self.client.session['products'], {str(self.product.pk): 1})
+        self.change_basket('remove')
+        self.assertEqual(self.client.session['products'], {})
+
+    def test_basket_totals(self):
+        self.set_basket({str(self.product.pk): 3})
+        response = self.client.get(reverse('webapp:basket'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['basket_total'], 300)
+
+    def test_legacy_list_basket_is_converted(self):
+        self.set_basket([str(self.product.pk), str(self.product.pk)])
+        response = self.client.get(reverse('webapp:basket'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['basket'][0]['qty'], 2)
+        self.change_basket('add')
+        self.assertEqual(self.client.session['products'], {str(self.product.pk): 3})
+
+    def test_legacy_session_on_every_page(self):
+        session = self.client.session
+        session['products'] = [str(self.product.pk)] * 3
+        session['products_count'] = 3
+        session.save()
+        response = self.client.get(reverse('webapp:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['products_count'], 3)
+        self.assertNotIn('products_count', self.client.session)
+
+    def test_basket_skips_deleted_product(self):
+        self.set_basket({str(self.product.pk): 1, '999': 1})
+        response = self.client.get(reverse('webapp:basket'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['basket']), 1)
+
+
+class ProductDeleteTestCase(ProductTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_user('user', password='user'))
+
+    def test_delete_hides_product_from_index(self):
+        response = self.client.get(reverse('webapp:index'))
+        self.assertIn(self.product, response.context['product_list'])
+        response = self.client.post(reverse('webapp:product_delete', kwargs={'pk': self.product.pk}))
+        self.assertRedirects(response, reverse('webapp:index'))
+        self.product.refresh_from_db()
+        self.assertFalse(self.product.in_order)
+        response = self.client.get(reverse('webapp:index'))
+        self.assertNotIn(self.product, response.context['product_list'])
+
+    def test_delete_unknown_product(self):
+        response = self.client.post(reverse('webapp:product_delete', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, 404)
+
+
+class IndexCacheTestCase(ProductTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(29):
+            Product.objects.create(name='Товар {}'.format(i), price=10, photo='product_images/{}.png'.format(i))
+
+    def test_cached_page_skips_database(self):
+        self.client.get(reverse('webapp:index'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('webapp:index'))
+        self.assertEqual(len(response.context['product_list']), 25)
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 2)
+
+    def test_pages_are_cached_separately(self):
+        self.client.get(reverse('webapp:index'))
+        response = self.client.get(reverse('webapp:index'), {'page': 2})
+        self.assertEqual(len(response.context['product_list']), 5)
+        self.assertEqual(response.context['page_obj'].number, 2)
+
+    def test_product_save_invalidates_pages(self):
+        self.client.get(reverse('webapp:index'))
+        product = Product.objects.create(name='Новый', price=10, photo='product_images/new.png')
+        response = self.client.get(reverse('webapp:index'))
+        self.assertEqual(response.context['product_list'][0], product)
+
+
+class OrderStatusTestCase(TestCase):
+    def setUp(self):
+        self.order = Order.objects.create(first_name='Иван', last_name='Иванов', email='ivan@example.com',
+                                          phone='123')
+        self.updated_at = timezone.now() - timedelta(days=1)
+        Order.objects.filter(pk=self.order.pk).update(updated_at=self.updated_at)
+        self.factory = RequestFactory()
+
+    def change_status(self, view, pk):
+        return view.as_view()(self.factory.get('/'), pk=pk)
+
+    def assert_status_changed(self, view, status):
+        response = self.change_status(view, self.order.pk)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, reverse('webapp:order_detail', kwargs={'pk': self.order.pk}))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, status)
+        self.assertGreater(self.order.updated_at, self.updated_at)
+
+    def test_deliver(self):
+        self.assert_status_changed(OrderDeliverView, 'delivered')
+
+    def test_cancel(self):
+        self.assert_status_changed(OrderCancelView, 'canceled')
+
+    def test_unknown_order(self):
+        for view in (OrderDeliverView, OrderCancelView):
+            with self.assertRaises(Http404):
+                self.change_status(view, self.order.pk + 1)
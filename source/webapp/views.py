@@ -1,12 +1,19 @@
-from django.http import HttpResponseRedirect
+from django.core.cache import cache
+from django.core.paginator import Page
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import HttpResponseRedirect, Http404
 from django.shortcuts import reverse, redirect, get_object_or_404
 
 from django.urls import reverse_lazy
+from django.utils import timezone
 from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 
+from webapp.basket import get_basket_products
 from webapp.forms import BasketOrderCreateForm, ManualOrderForm, OrderProductForm
-from webapp.models import Product, OrderProduct, Order
+from webapp.models import Product, OrderProduct, Order, INDEX_PRODUCTS_CACHE_KEY, ORDERABLE_PRODUCTS_CACHE_KEY, \
+    clear_product_cache, get_product_cache_version
 from django.contrib.auth.mixins import PermissionRequiredMixin, LoginRequiredMixin
 from django.contrib import messages
 
@@ -15,9 +22,25 @@ class IndexView(ListView):
     model = Product
     template_name = 'index.html'
     context_object_name = 'product_list'
+    paginate_by = 25
+    cache_timeout = 60
 
     def get_queryset(self):
-        return Product.objects.filter(in_order=True)
+        return Product.objects.filter(in_order=True).only('pk', 'name', 'category', 'price', 'photo').order_by('-pk')
+
+    def paginate_queryset(self, queryset, page_size):
+        cache_key = '{}:{}:{}'.format(INDEX_PRODUCTS_CACHE_KEY, get_product_cache_version(),
+                                      self.request.GET.get(self.page_kwarg) or 1)
+        cached = cache.get(cache_key)
+        if cached is None:
+            paginator, page, object_list, is_paginated = super().paginate_queryset(queryset, page_size)
+            cached = (paginator.count, page.number, list(object_list))
+            cache.set(cache_key, cached, self.cache_timeout)
+        count, number, object_list = cached
+        paginator = self.get_paginator(queryset, page_size)
+        paginator.count = count
+        page = Page(object_list, number, paginator)
+        return paginator, page, page.object_list, page.has_other_pages()
 
 
 class ProductView( DetailView):
@@ -53,35 +76,46 @@ class ProductDeleteView(LoginRequiredMixin, DeleteView):
     context_object_name = 'product'
 
     def delete(self, request, *args, **kwargs):
-        product = self.object = self.get_object()
-        product.in_order = False
-        product.save()
-        return HttpResponseRedirect(self.get_success_url())
+        if not Product.objects.filter(pk=kwargs['pk']).update(in_order=False):
+            raise Http404
+        # update() не отправляет post_save, поэтому кэши товаров сбрасываем вручную
+        clear_product_cache()
+        return HttpResponseRedirect(self.success_url)
 
 
 class BasketChangeView(View):
+    cache_timeout = 60
+
     def get(self, request, *args, **kwargs):
-        products = request.session.get('products', [])
+        products = get_basket_products(request.session)
 
-        pk = request.GET.get('pk')
         action = request.GET.get('action')
         next_url = request.GET.get('next', reverse('webapp:index'))
+        try:
+            pk = int(request.GET.get('pk'))
+        except (TypeError, ValueError):
+            return redirect(next_url)
 
+        key = str(pk)
         if action == 'add':
-            product = get_object_or_404(Product, pk=pk)
-            if product.in_order:
-                products.append(pk)
-        else:
-            for product_pk in products:
-                if product_pk == pk:
-                    products.remove(product_pk)
-                    break
+            if pk in self._get_orderable_pks():
+                products[key] = products.get(key, 0) + 1
+        elif key in products:
+            products[key] -= 1
+            if products[key] <= 0:
+                del products[key]
 
         request.session['products'] = products
-        request.session['products_count'] = len(products)
 
         return redirect(next_url)
 
+    def _get_orderable_pks(self):
+        return cache.get_or_set(
+            ORDERABLE_PRODUCTS_CACHE_KEY,
+            lambda: set(Product.objects.filter(in_order=True).values_list('pk', flat=True)),
+            self.cache_timeout
+        )
+
 
 class BasketView(CreateView):
     model = Order
@@ -104,88 +138,96 @@ class BasketView(CreateView):
         if self._basket_empty():
             form.add_error(None, 'В корзине отсутствуют товары!')
             return self.form_invalid(form)
-        response = super().form_valid(form)
-        self._save_order_products()
+        with transaction.atomic():
+            response = super().form_valid(form)
+            self._save_order_products()
         self._clean_basket()
         messages.success(self.request, 'Заказ оформлен!')
         return response
 
     def _prepare_basket(self):
         totals = self._get_totals()
+        product_map = self._get_products()
         basket = []
         basket_total = 0
         for pk, qty in totals.items():
-            product = Product.objects.get(pk=int(pk))
+            product = product_map.get(int(pk))
+            if product is None:
+                continue
             total = product.price * qty
             basket_total += total
             basket.append({'product': product, 'qty': qty, 'total': total})
         return basket, basket_total
 
     def _get_totals(self):
-        products = self.request.session.get('products', [])
-        totals = {}
-        for product_pk in products:
-            if product_pk not in totals:
-                totals[product_pk] = 0
-            totals[product_pk] += 1
-        return totals
+        if not hasattr(self, '_totals'):
+            self._totals = get_basket_products(self.request.session)
+        return self._totals
+
+    def _get_products(self):
+        if not hasattr(self, '_products'):
+            self._products = Product.objects.in_bulk([int(pk) for pk in self._get_totals().keys()])
+        return self._products
 
     def _basket_empty(self):
-        products = self.request.session.get('products', [])
-        return len(products) == 0
+        return not self._get_products()
 
     def _save_order_products(self):
         totals = self._get_totals()
-        for pk, qty in totals.items():
-            OrderProduct.objects.create(product_id=pk, order=self.object, amount=qty)
+        product_map = self._get_products()
+        OrderProduct.objects.bulk_create([
+            OrderProduct(product_id=pk, order=self.object, amount=qty) for pk, qty in totals.items()
+            if int(pk) in product_map
+        ])
 
     def _clean_basket(self):
-        if 'products' in self.request.session:
-            self.request.session.pop('products')
-        if 'products_count' in self.request.session:
-            self.request.session.pop('products_count')
+        self.request.session.pop('products', None)
 
 
 class OrderListView(ListView):
     template_name = 'order/list.html'
+    context_object_name = 'orders'
+    paginate_by = 25
 
     def get_queryset(self):
         if self.request.user.has_perm('webapp.view_order'):
-            return Order.objects.all().order_by('-created_at')
-        return self.request.user.orders.all()
+            orders = Order.objects.all()
+        else:
+            orders = self.request.user.orders.all()
+        return orders.order_by('-created_at')
 
 
 class OrderDetailView(DetailView):
     template_name = 'order/detail.html'
 
     def get_queryset(self):
+        order_products = Prefetch('orderproduct_set', queryset=OrderProduct.objects.select_related('product'))
         if self.request.user.has_perm('webapp.view_order'):
-            return Order.objects.all()
-        return self.request.user.orders.all()
+            return Order.objects.prefetch_related(order_products)
+        return self.request.user.orders.prefetch_related(order_products)
 
 
 class OrderCreateView(CreateView):
     model = Order
     template_name = 'order/create.html'
     form_class = ManualOrderForm
-    fields = ('user', 'first_name', 'last_name', 'phone', 'email')
     success_url = reverse_lazy('webapp:index')
 
 
 class OrderDeliverView(View):
     def get(self, request, *args, **kwargs):
-        order = get_object_or_404(Order, pk=self.kwargs['pk'])
-        order.status = 'delivered'
-        order.save()
-        return reverse('webapp:order_detail', kwargs={'pk': order.pk})
+        updated = Order.objects.filter(pk=self.kwargs['pk']).update(status='delivered', updated_at=timezone.now())
+        if not updated:
+            raise Http404
+        return HttpResponseRedirect(reverse('webapp:order_detail', kwargs={'pk': self.kwargs['pk']}))
 
 
 class OrderCancelView(View):
     def get(self, request, *args, **kwargs):
-        order = get_object_or_404(Order, pk=self.kwargs['pk'])
-        order.status = 'canceled'
-        order.save()
-        return reverse('webapp:order_detail', kwargs={'pk': order.pk})
+        updated = Order.objects.filter(pk=self.kwargs['pk']).update(status='canceled', updated_at=timezone.now())
+        if not updated:
+            raise Http404
+        return HttpResponseRedirect(reverse('webapp:order_detail', kwargs={'pk': self.kwargs['pk']}))
 
 
 class OrderProductCreateView(CreateView):